@@ -50,17 +50,13 @@ def input_with_timeout(prompt: str, timeout: int):
         print()
         return ''
     else:
-        import selectors
+        import select
 
         print_without_end_line(prompt)
-        with selectors.DefaultSelector() as selector:
-            selector.register(sys.stdin, selectors.EVENT_READ)
-            events = selector.select(timeout)
-
-            if events:
-                key, _ = events[0]
-                res_str = key.fileobj.readline().rstrip('\n')
-            else:
-                print()
-            selector.unregister(sys.stdin)
+        # A single select() call waits for input without creating and registering a selector object
+        ready, _, _ = select.select([sys.stdin], [], [], timeout)
+        if ready:
+            res_str = sys.stdin.readline().rstrip('\n')
+        else:
+            print()
         return res_str
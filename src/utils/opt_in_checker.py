@@ -3,16 +3,97 @@
 
 import logging as log
 import os
+import stat
+import tempfile
 import time
 from enum import Enum
+from functools import lru_cache
 from pathlib import Path
 from platform import system
-from sys import stdin
+from sys import modules, stdin
 
 from .colored_print import colored_print
 from .input_with_timeout import input_with_timeout
 
 
+def _stdin_is_tty():
+    """
+    Checks if stdin is terminal.
+    :return: True if stdin is terminal, otherwise False
+    """
+    try:
+        return stdin is not None and stdin.isatty()
+    except ValueError:
+        # stdin is closed
+        return False
+
+
+# The platform and stdin type do not change during the process lifetime, so they are resolved once on import
+_PLATFORM = system()
+_IS_WINDOWS = _PLATFORM == 'Windows'
+_IS_LINUX = _PLATFORM == 'Linux'
+_IS_POSIX_LIKE = _PLATFORM in ('Linux', 'Darwin')
+_STDIN_IS_TTY = _stdin_is_tty()
+
+
+def _current_umask():
+    """
+    Returns the process umask. os.umask() can only be read by setting it, so the previous value is restored.
+    :return: the process umask.
+    """
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return umask
+
+
+# Files created by the process get 0o666 filtered by the umask, so it is read once on import
+_UMASK = _current_umask()
+
+
+def _stat_or_none(path: str):
+    """
+    Runs os.stat() on the path following symlinks, returning None instead of raising on error.
+    :param path: path to check.
+    :return: stat result or None if the path is not accessible.
+    """
+    try:
+        return os.stat(path)
+    except (OSError, ValueError):
+        return None
+
+
+def _probe(path: str):
+    """
+    Checks the path with a single stat() call and a single access() call.
+    :param path: path to check.
+    :return: the tuple (exists, is_dir, writable).
+    """
+    st = _stat_or_none(path)
+    if st is None:
+        return False, False, False
+    return True, stat.S_ISDIR(st.st_mode), os.access(path, os.W_OK)
+
+
+OPT_IN_OUT_SCRIPT_NAME = "opt_in_out"
+DOC_LINK = "docs.openvino.ai"
+OPT_IN_OUT_SCRIPT_RUN_COMMAND = "\'{} --opt_out\'".format(OPT_IN_OUT_SCRIPT_NAME)
+OPT_IN_QUESTION = "Intel would like your permission to collect software performance and usage data for the " \
+                  "purpose of improving Intel products and services. This data will be collected directly " \
+                  "by Intel or through the use of Google Analytics. This data will be stored in countries " \
+                  "where Intel or Google operate. Intel operates around the world and your usage data will " \
+                  "be sent to Intel in the United States or other countries.\nYou can opt-out at any time " \
+                  "in the future by running {}.\n" \
+                  "More Information is available at {}.\n" \
+                  "Please type ‘Y’ to give your consent or ‘N’ to decline.".format(OPT_IN_OUT_SCRIPT_RUN_COMMAND,
+                                                                                   DOC_LINK)
+OPT_IN_QUESTION_INCORRECT_INPUT = "Please type ‘Y’ to give your consent or ‘N’ to decline."
+RESPONSE_CONFIRMATION_ACCEPT = "The selected option was to collect telemetry data."
+RESPONSE_CONFIRMATION_DECLINE = "The selected option was NOT to collect telemetry data."
+RESPONSE_CONFIRMATION_TIMER_REACHED = "The timer has expired and no data will be collected."
+# Setting this environment variable to "1" declines telemetry without checking the ISIP file
+OPT_OUT_ENV_VARIABLE = "OPENVINO_TELEMETRY_OPT_OUT"
+
+
 class ISIPCheckResult(Enum):
     DECLINED = 0
     ACCEPTED = 1
@@ -25,28 +106,52 @@ class DialogResult(Enum):
     TIMEOUT_REACHED = 2
 
 
+def _linux_config_dir():
+    """
+    Returns the base directory for the ISIP file on Linux according to the XDG Base Directory specification.
+    The home directory is kept if the ISIP file already exists there and not in the config directory,
+    or if the config directory is absent.
+    :return: base directory for the ISIP file.
+    """
+    home = str(Path.home())
+    config_dir = os.environ.get('XDG_CONFIG_HOME')
+    # The specification requires the path to be absolute, otherwise it should be ignored
+    if not config_dir or not os.path.isabs(config_dir):
+        config_dir = os.path.join(home, '.config')
+
+    # The location is chosen by the existing ISIP file, as the 'intel' directory may be created by other tools
+    if os.path.exists(os.path.join(config_dir, 'intel', 'openvino_telemetry')):
+        return config_dir
+    if os.path.exists(os.path.join(home, 'intel', 'openvino_telemetry')):
+        return home
+    if os.path.isdir(config_dir):
+        return config_dir
+    return home
+
+
+# Maps normalized user input to the opt-in dialog result
+_DIALOG_ANSWERS = {
+    "y": DialogResult.ACCEPTED,
+    "yes": DialogResult.ACCEPTED,
+    "n": DialogResult.DECLINED,
+    "no": DialogResult.DECLINED,
+}
+
+
 class OptInChecker:
     dialog_timeout = 50  # seconds
     path_to_opt_in_out_script = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
-    opt_in_out_script_name = "opt_in_out"
-    doc_link = "docs.openvino.ai"
-    opt_in_out_script_run_command = "\'{} --opt_out\'".format(opt_in_out_script_name)
-    opt_in_question = "Intel would like your permission to collect software performance and usage data for the " \
-                      "purpose of improving Intel products and services. This data will be collected directly " \
-                      "by Intel or through the use of Google Analytics. This data will be stored in countries " \
-                      "where Intel or Google operate. Intel operates around the world and your usage data will " \
-                      "be sent to Intel in the United States or other countries.\nYou can opt-out at any time " \
-                      "in the future by running {}.\n" \
-                      "More Information is available at {}.\n" \
-                      "Please type ‘Y’ to give your consent or ‘N’ to decline.".format(opt_in_out_script_run_command,
-                                                                                       doc_link)
-    opt_in_question_incorrect_input = "Please type ‘Y’ to give your consent or ‘N’ to decline."
-    response_confirmation_accept = "The selected option was to collect telemetry data."
-    response_confirmation_decline = "The selected option was NOT to collect telemetry data."
-    response_confirmation_timer_reached = "The timer has expired and no data will be collected."
-
-    @staticmethod
-    def _ask_opt_in(question: str, timeout: int):
+    opt_in_out_script_name = OPT_IN_OUT_SCRIPT_NAME
+    doc_link = DOC_LINK
+    opt_in_out_script_run_command = OPT_IN_OUT_SCRIPT_RUN_COMMAND
+    opt_in_question = OPT_IN_QUESTION
+    opt_in_question_incorrect_input = OPT_IN_QUESTION_INCORRECT_INPUT
+    response_confirmation_accept = RESPONSE_CONFIRMATION_ACCEPT
+    response_confirmation_decline = RESPONSE_CONFIRMATION_DECLINE
+    response_confirmation_timer_reached = RESPONSE_CONFIRMATION_TIMER_REACHED
+    _main_process_cache = None  # (pid, result) of the last main process check
+
+    def _ask_opt_in(self, question: str, timeout: int):
         """
         Runs input with timeout and checks user input.
         :param question: question that will be printed on the screen.
@@ -55,55 +160,51 @@ class OptInChecker:
         """
         colored_print(question)
         answer = input_with_timeout(prompt='>>', timeout=timeout)
-        answer = answer.lower().strip()
-        if answer == "n" or answer == "no":
-            colored_print(OptInChecker.response_confirmation_decline)
-            return DialogResult.DECLINED
-        if answer == "y" or answer == "yes":
-            colored_print(OptInChecker.response_confirmation_accept)
-            return DialogResult.ACCEPTED
-        return DialogResult.TIMEOUT_REACHED
+        result = _DIALOG_ANSWERS.get(answer.strip().casefold(), DialogResult.TIMEOUT_REACHED)
+        if result == DialogResult.DECLINED:
+            colored_print(self.response_confirmation_decline)
+        elif result == DialogResult.ACCEPTED:
+            colored_print(self.response_confirmation_accept)
+        return result
 
     def opt_in_dialog(self):
         """
         Runs opt-in dialog until the timeout is expired.
         :return: opt-in dialog result.
         """
-        start_time = time.time()
+        # Monotonic clock is not affected by system time changes
+        deadline = time.monotonic() + self.dialog_timeout
         answer = self._ask_opt_in(self.opt_in_question, self.dialog_timeout)
-        time_passed = time.time() - start_time
-        while time_passed < self.dialog_timeout and answer == DialogResult.TIMEOUT_REACHED:
-            answer = self._ask_opt_in(self.opt_in_question_incorrect_input, self.dialog_timeout - time_passed)
-            time_passed = time.time() - start_time
+        remaining = deadline - time.monotonic()
+        while remaining > 0 and answer == DialogResult.TIMEOUT_REACHED:
+            answer = self._ask_opt_in(self.opt_in_question_incorrect_input, remaining)
+            remaining = deadline - time.monotonic()
 
         if answer == DialogResult.TIMEOUT_REACHED:
-            colored_print(OptInChecker.response_confirmation_timer_reached)
+            colored_print(self.response_confirmation_timer_reached)
 
         return answer
 
     @staticmethod
+    @lru_cache(maxsize=1)
     def isip_file_base_dir():
         """
-        Returns the base directory of the ISIP file.
+        Returns the base directory of the ISIP file. The result is computed once and cached.
         :return: base directory of the ISIP file.
         """
-        platform = system()
-
         dir_to_check = None
 
-        if platform == 'Windows':
-            dir_to_check = '$LOCALAPPDATA'
-        elif platform in ['Linux', 'Darwin']:
-            dir_to_check = Path.home()
-
-        if dir_to_check is None:
-            raise Exception('Failed to find location of the ISIP file.')
+        if _IS_WINDOWS:
+            dir_to_check = os.environ.get('LOCALAPPDATA')
+        elif _IS_LINUX:
+            dir_to_check = _linux_config_dir()
+        elif _IS_POSIX_LIKE:
+            dir_to_check = str(Path.home())
 
-        isip_base_dir = os.path.expandvars(dir_to_check)
-        if not os.path.isdir(isip_base_dir):
+        if not dir_to_check or not os.path.isdir(dir_to_check):
             raise Exception('Failed to find location of the ISIP file.')
 
-        return isip_base_dir
+        return dir_to_check
 
     @staticmethod
     def isip_file_subdirectory():
@@ -111,10 +212,9 @@ class OptInChecker:
         Returns ISIP file subdirectory.
         :return: ISIP file subdirectory.
         """
-        platform = system()
-        if platform == 'Windows':
+        if _IS_WINDOWS:
             return 'Intel Corporation'
-        elif platform in ['Linux', 'Darwin']:
+        elif _IS_POSIX_LIKE:
             return 'intel'
         raise Exception('Failed to find location of the ISIP file.')
 
@@ -133,7 +233,8 @@ class OptInChecker:
         if not self.create_or_check_isip_dir():
             return False
         try:
-            open(self.isip_file(), 'w').close()
+            # Raw file descriptor avoids creating Python file objects just to close them
+            os.close(os.open(self.isip_file(), os.O_CREAT | os.O_WRONLY | os.O_TRUNC, 0o666))
         except Exception:
             return False
         return True
@@ -144,9 +245,8 @@ class OptInChecker:
         :return: True if the directory is created and writable, otherwise False
         """
         base_dir = self.isip_file_base_dir()
-        base_is_dir = os.path.isdir(base_dir)
-        base_dir_exists = os.path.exists(base_dir)
-        base_w_access = os.access(base_dir, os.W_OK)
+        subdir = self.isip_file_subdirectory()
+        base_dir_exists, base_is_dir, base_w_access = _probe(base_dir)
 
         if not base_dir_exists or not base_is_dir:
             return False
@@ -155,9 +255,8 @@ class OptInChecker:
                         "Please allow write access to the following directory: {}".format(base_dir))
             return False
 
-        isip_dir = os.path.join(self.isip_file_base_dir(), self.isip_file_subdirectory())
-        isip_is_dir = os.path.isdir(isip_dir)
-        isip_dir_exists = os.path.exists(isip_dir)
+        isip_dir = os.path.join(base_dir, subdir)
+        isip_dir_exists, isip_is_dir, isip_w_access = _probe(isip_dir)
 
         # If ISIP path exists and it is not directory, we try to remove it
         if isip_dir_exists and not isip_is_dir:
@@ -166,44 +265,72 @@ class OptInChecker:
             except:
                 log.warning("Unable to create directory for ISIP file, as {} is invalid directory.".format(isip_dir))
                 return False
+            isip_dir_exists = False
 
-        if not os.path.exists(isip_dir):
+        if not isip_dir_exists:
             try:
+                # mkdir() raises an exception if the directory is not created
                 os.mkdir(isip_dir)
-
-                # check that directory is created
-                if not os.path.exists(isip_dir):
-                    return False
             except Exception as e:
                 log.warning("Failed to create directory for ISIP file: {}".format(str(e)))
                 return False
+            isip_w_access = os.access(isip_dir, os.W_OK)
 
-        isip_w_access = os.access(isip_dir, os.W_OK)
         if not isip_w_access:
             log.warning("Failed to create ISIP file. "
                         "Please allow write access to the following directory: {}".format(isip_dir))
             return False
         return True
 
+    @staticmethod
+    def _write_isip_file(isip_file: str, content: str):
+        """
+        Atomically replaces the ISIP file with the given content. A symlinked ISIP file is updated through the link.
+        On POSIX a read-only ISIP file is replaced as long as its directory is writable.
+        :param isip_file: path to the ISIP file.
+        :param content: content of the ISIP file.
+        """
+        target = os.path.realpath(isip_file)
+        # A unique temporary file prevents concurrent writers from truncating each other's file,
+        # the prefix allows to identify the file if it is left after a crash
+        fd, tmp_file = tempfile.mkstemp(prefix='.openvino_telemetry.', dir=os.path.dirname(target))
+        try:
+            # The file is intentionally not fsync'ed: losing the 1-byte flag on a crash only
+            # means the opt-in dialog is shown again, which is not worth the fsync latency on startup.
+            with os.fdopen(fd, 'w') as file:
+                file.write(content)
+            # mkstemp() creates the file with 0o600, so the mode of open(path, 'w') is restored
+            target_stat = _stat_or_none(target)
+            mode = target_stat.st_mode & 0o777 if target_stat is not None else 0o666 & ~_UMASK
+            os.chmod(tmp_file, mode)
+            os.replace(tmp_file, target)
+        except Exception:
+            try:
+                os.remove(tmp_file)
+            except OSError:
+                pass
+            raise
+
     def update_result(self, result: ISIPCheckResult):
         """
         Updates the 'opt_in' value in the ISIP file.
         :param result: opt-in dialog result.
         :return: False if the ISIP file is not writable, otherwise True
         """
-        if not os.path.exists(self.isip_file()):
-            if not self.create_new_isip_file():
-                return False
-        if not os.access(self.isip_file(), os.W_OK):
-            log.warning("Failed to update opt-in status. "
-                        "Please allow write access to the following file: {}".format(self.isip_file()))
-            return False
+        isip_file = self.isip_file()
+        content = "1" if result == ISIPCheckResult.ACCEPTED else "0"
         try:
-            with open(self.isip_file(), 'w') as file:
-                if result == ISIPCheckResult.ACCEPTED:
-                    file.write("1")
-                else:
-                    file.write("0")
+            self._write_isip_file(isip_file, content)
+        except OSError:
+            # The ISIP directory may be absent, not writable or a file, so try to create it and write once more
+            if not self.create_or_check_isip_dir():
+                return False
+            try:
+                self._write_isip_file(isip_file, content)
+            except Exception:
+                log.warning("Failed to update opt-in status. "
+                            "Please allow write access to the following file: {}".format(isip_file))
+                return False
         except Exception:
             return False
         return True
@@ -217,17 +344,28 @@ class OptInChecker:
             return True
         return False
 
+    @staticmethod
+    def _read_isip_file(isip_file: str):
+        """
+        Reads the first line of the ISIP file using a raw file descriptor, as the file contains a single character.
+        :param isip_file: path to the ISIP file.
+        :return: the first line of the ISIP file without surrounding whitespaces as bytes.
+        """
+        fd = os.open(isip_file, os.O_RDONLY)
+        try:
+            data = os.read(fd, 8)
+        finally:
+            os.close(fd)
+        return data.split(b'\n', 1)[0].strip()
+
     def get_info_from_isip(self):
         """
         Gets information from ISIP file.
         :return: the tuple, where the first element is True if the file is read successfully, otherwise False
         and the second element is the content of the ISIP file.
         """
-        if not os.access(self.isip_file(), os.R_OK):
-            return False, {}
         try:
-            with open(self.isip_file(), 'r') as file:
-                content = file.readline().strip()
+            content = self._read_isip_file(self.isip_file()).decode('ascii')
         except Exception:
             return False, {}
         return True, content
@@ -238,61 +376,84 @@ class OptInChecker:
         Checks if stdin is terminal.
         :return: True if stdin is terminal, otherwise False
         """
-        return stdin.isatty()
+        return _STDIN_IS_TTY
 
-    @staticmethod
-    def _check_main_process():
-        platform = system()
-        if platform == 'Windows':
+    @classmethod
+    def _check_main_process(cls):
+        if _IS_WINDOWS:
             # In Windows 'os' module does not have getpid() and getsid(),
             # so the following checks are not applicable.
             # Subprocess check in Windows is handled by self._check_input_is_terminal(),
             # which does not work for Unix subprocesses.
             return True
 
+        # The result does not change during the process lifetime, so it is cached per process id
+        pid = os.getpid()
+        if cls._main_process_cache is not None and cls._main_process_cache[0] == pid:
+            return cls._main_process_cache[1]
+
         try:
             # Check that current process is the leader of process group
-            if os.getpid() != os.getpgid(0):
-                return False
-
-            # Check that parent process is in same session as current process
-            if os.getsid(os.getppid()) != os.getsid(0):
-                return False
+            # and that parent process is in same session as current process
+            result = pid == os.getpgid(0) and os.getsid(os.getppid()) == os.getsid(0)
         except:
             # If we couldn't check main process, disable opt-in dialog
             return False
-        return True
+        cls._main_process_cache = (pid, result)
+        return result
 
     @staticmethod
+    @lru_cache(maxsize=1)
     def _check_run_in_notebook():
         """
-        Checks that script is executed in Jupyter Notebook.
+        Checks that script is executed in Jupyter Notebook. The result is computed once and cached.
         :return: True script is executed in Jupyter Notebook, otherwise False
         """
+        # The shell is looked up via the IPython module instead of the get_ipython() builtin injected by IPython
+        ipython = modules.get('IPython')
+        if ipython is None:
+            return False
         try:
-            return get_ipython().__class__.__name__ == 'ZMQInteractiveShell'
-        except NameError:
-            pass
-        return False
+            return type(ipython.get_ipython()).__name__ == 'ZMQInteractiveShell'
+        except Exception:
+            return False
+
+    def _no_isip_file_result(self):
+        """
+        Checks if the opt-in dialog can be shown when the ISIP file does not exist.
+        :return: ISIPCheckResult.NO_FILE if the dialog can be shown, otherwise ISIPCheckResult.DECLINED
+        """
+        if not self._check_main_process():
+            return ISIPCheckResult.DECLINED
+
+        if not self._check_input_is_terminal() or self._check_run_in_notebook():
+            return ISIPCheckResult.DECLINED
+        return ISIPCheckResult.NO_FILE
 
     def check(self):
         """
         Checks if user has accepted the collection of the information by checking the ISIP file.
         :return: opt-in dialog result
         """
-        if not os.path.exists(self.isip_file()):
-            if not self._check_main_process():
-                return ISIPCheckResult.DECLINED
+        if os.environ.get(OPT_OUT_ENV_VARIABLE) == "1":
+            return ISIPCheckResult.DECLINED
 
-            if not self._check_input_is_terminal() or self._check_run_in_notebook():
-                return ISIPCheckResult.DECLINED
-            return ISIPCheckResult.NO_FILE
-
-        if not self.isip_is_empty():
-            _, content = self.get_info_from_isip()
-            if content == "1":
-                return ISIPCheckResult.ACCEPTED
-            elif content == "0":
-                return ISIPCheckResult.DECLINED
+        isip_file = self.isip_file()
+        content = None
+        # The file is read with a single open() instead of separate exists/stat/access checks
+        try:
+            content = self._read_isip_file(isip_file)
+        except (FileNotFoundError, NotADirectoryError):
+            return self._no_isip_file_result()
+        except Exception:
+            # The file may be unreachable because of permissions of the parent directories
+            if _stat_or_none(isip_file) is None:
+                return self._no_isip_file_result()
+
+        # The content is compared as bytes, so it is not decoded
+        if content == b"1":
+            return ISIPCheckResult.ACCEPTED
+        elif content == b"0":
+            return ISIPCheckResult.DECLINED
         log.warning("Incorrect format of the file with opt-in status.")
         return ISIPCheckResult.DECLINED
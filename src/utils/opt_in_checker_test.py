@@ -4,12 +4,16 @@
 import datetime
 import json
 import os
+import sys
+import tempfile
 import unittest
 from datetime import datetime, timedelta
 from platform import system
-from unittest.mock import MagicMock
+from types import ModuleType
+from unittest.mock import MagicMock, patch
 
-from .opt_in_checker import OptInChecker, ISIPCheckResult
+from .opt_in_checker import OptInChecker, DialogResult, ISIPCheckResult, OPT_OUT_ENV_VARIABLE, \
+    _UMASK, _linux_config_dir
 
 
 class OptInCheckerTest(unittest.TestCase):
@@ -90,6 +94,17 @@ class OptInCheckerTest(unittest.TestCase):
 
         self.remove_test_subdir()
 
+    def test_update_result_subdir_is_file(self):
+        self.init_opt_in_checker()
+        test_subdir = os.path.join(self.test_directory, self.test_subdir)
+        os.rmdir(test_subdir)
+        open(test_subdir, 'w').close()
+
+        self.assertTrue(self.opt_in_checker.update_result(ISIPCheckResult.ACCEPTED) is True)
+        self.assertTrue(os.path.isdir(test_subdir))
+        self.assertTrue(self.opt_in_checker.check() == ISIPCheckResult.ACCEPTED)
+        self.remove_test_subdir()
+
     def test_incorrect_control_file_format(self):
         self.init_opt_in_checker()
         with open(self.opt_in_checker.isip_file(), 'w') as file:
@@ -130,3 +145,180 @@ class OptInCheckerTest(unittest.TestCase):
         result = self.opt_in_checker.check()
         self.assertTrue(result == ISIPCheckResult.ACCEPTED)
         self.remove_test_subdir()
+
+    def test_update_result(self):
+        self.init_opt_in_checker()
+        test_subdir = os.path.join(self.test_directory, self.test_subdir)
+        os.rmdir(test_subdir)
+        self.assertTrue(self.opt_in_checker.update_result(ISIPCheckResult.ACCEPTED) is True)
+        self.assertTrue(self.opt_in_checker.check() == ISIPCheckResult.ACCEPTED)
+        # At Windows chmod() sets only the file’s read-only flag, so modes are checked on other platforms only
+        if system() != 'Windows':
+            self.assertTrue(os.stat(self.opt_in_checker.isip_file()).st_mode & 0o777 == 0o666 & ~_UMASK)
+            os.chmod(self.opt_in_checker.isip_file(), 0o600)
+        self.assertTrue(self.opt_in_checker.update_result(ISIPCheckResult.DECLINED) is True)
+        self.assertTrue(self.opt_in_checker.check() == ISIPCheckResult.DECLINED)
+        # The mode of the existing file is kept
+        if system() != 'Windows':
+            self.assertTrue(os.stat(self.opt_in_checker.isip_file()).st_mode & 0o777 == 0o600)
+        self.assertTrue(os.listdir(test_subdir) == ['openvino_telemetry'])
+        self.remove_test_subdir()
+
+    def test_update_result_without_fsync(self):
+        self.init_opt_in_checker()
+        with patch('os.fsync') as fsync_mock:
+            self.assertTrue(self.opt_in_checker.update_result(ISIPCheckResult.ACCEPTED) is True)
+        fsync_mock.assert_not_called()
+        self.remove_test_subdir()
+
+    def test_linux_config_dir(self):
+        with tempfile.TemporaryDirectory() as home, patch('pathlib.Path.home', return_value=home):
+            config_dir = os.path.join(home, 'config')
+            with patch.dict(os.environ, {'XDG_CONFIG_HOME': config_dir}):
+                # Config directory does not exist
+                self.assertTrue(_linux_config_dir() == home)
+                os.mkdir(config_dir)
+                self.assertTrue(_linux_config_dir() == config_dir)
+                # ISIP directory in home without the ISIP file is ignored
+                os.mkdir(os.path.join(home, 'intel'))
+                self.assertTrue(_linux_config_dir() == config_dir)
+                # Existing ISIP file in home is kept
+                open(os.path.join(home, 'intel', 'openvino_telemetry'), 'w').close()
+                self.assertTrue(_linux_config_dir() == home)
+                # Existing ISIP file in the config directory has priority
+                os.mkdir(os.path.join(config_dir, 'intel'))
+                open(os.path.join(config_dir, 'intel', 'openvino_telemetry'), 'w').close()
+                self.assertTrue(_linux_config_dir() == config_dir)
+
+    def test_linux_config_dir_home_isip_dir_created_later(self):
+        with tempfile.TemporaryDirectory() as home, patch('pathlib.Path.home', return_value=home):
+            config_dir = os.path.join(home, 'config')
+            with patch.dict(os.environ, {'XDG_CONFIG_HOME': config_dir}):
+                os.makedirs(os.path.join(config_dir, 'intel'))
+                open(os.path.join(config_dir, 'intel', 'openvino_telemetry'), 'w').close()
+                self.assertTrue(_linux_config_dir() == config_dir)
+                # Another tool creates the ISIP directory in home after the consent is recorded
+                os.mkdir(os.path.join(home, 'intel'))
+                self.assertTrue(_linux_config_dir() == config_dir)
+
+    def test_opt_out_env_variable(self):
+        self.init_opt_in_checker()
+        with open(self.opt_in_checker.isip_file(), 'w') as file:
+            file.write("1")
+        with patch.dict(os.environ, {OPT_OUT_ENV_VARIABLE: '1'}):
+            self.assertTrue(self.opt_in_checker.check() == ISIPCheckResult.DECLINED)
+        self.assertTrue(self.opt_in_checker.check() == ISIPCheckResult.ACCEPTED)
+        self.remove_test_subdir()
+
+    def test_update_read_only_result(self):
+        # Windows does not allow to replace read-only files
+        if system() == 'Windows':
+            return
+        self.init_opt_in_checker()
+        with open(self.opt_in_checker.isip_file(), 'w') as file:
+            file.write("0")
+        os.chmod(self.opt_in_checker.isip_file(), 0o444)
+        # Read-only ISIP file is replaced as its directory is writable
+        self.assertTrue(self.opt_in_checker.update_result(ISIPCheckResult.ACCEPTED) is True)
+        self.assertTrue(self.opt_in_checker.check() == ISIPCheckResult.ACCEPTED)
+        self.remove_test_subdir()
+
+    def test_update_symlinked_result(self):
+        if system() == 'Windows':
+            return
+        self.init_opt_in_checker()
+        with tempfile.TemporaryDirectory() as target_dir:
+            target = os.path.join(target_dir, 'isip_target')
+            with open(target, 'w') as file:
+                file.write("0")
+            os.symlink(target, self.opt_in_checker.isip_file())
+            # The symlink is kept and the result is written to its target
+            self.assertTrue(self.opt_in_checker.update_result(ISIPCheckResult.ACCEPTED) is True)
+            self.assertTrue(os.path.islink(self.opt_in_checker.isip_file()))
+            with open(target, 'r') as file:
+                self.assertTrue(file.read() == "1")
+            self.remove_test_subdir()
+
+    def test_dialog_uses_overridden_strings(self):
+        opt_in_checker = OptInChecker()
+        opt_in_checker.opt_in_question = "question"
+        opt_in_checker.response_confirmation_accept = "accepted"
+        with patch(OptInChecker.__module__ + '.input_with_timeout', return_value=' Yes\n'), \
+                patch(OptInChecker.__module__ + '.colored_print') as print_mock:
+            self.assertTrue(opt_in_checker.opt_in_dialog() == DialogResult.ACCEPTED)
+        self.assertTrue([c.args[0] for c in print_mock.call_args_list] == ["question", "accepted"])
+
+    def test_main_process_cache(self):
+        # Main process check is not applicable on Windows
+        if system() == 'Windows':
+            return
+        with patch.object(OptInChecker, '_main_process_cache', None), \
+                patch('os.getpid', return_value=100), patch('os.getppid', return_value=99), \
+                patch('os.getpgid', return_value=100) as getpgid_mock, \
+                patch('os.getsid', return_value=1) as getsid_mock:
+            self.assertTrue(OptInChecker._check_main_process() is True)
+            self.assertTrue(OptInChecker._check_main_process() is True)
+            # The second call reuses the cached result
+            self.assertTrue(getpgid_mock.call_count == 1)
+            self.assertTrue(getsid_mock.call_count == 2)
+
+            # A new process id forces a new check
+            with patch('os.getpid', return_value=101):
+                self.assertTrue(OptInChecker._check_main_process() is False)
+                self.assertTrue(getpgid_mock.call_count == 2)
+                self.assertTrue(OptInChecker._main_process_cache == (101, False))
+
+    def test_empty_isip_file(self):
+        self.init_opt_in_checker()
+        open(self.opt_in_checker.isip_file(), 'w').close()
+        self.assertTrue(self.opt_in_checker.check() == ISIPCheckResult.DECLINED)
+        self.remove_test_subdir()
+
+    def test_isip_parent_is_file(self):
+        self.init_opt_in_checker()
+        test_subdir = os.path.join(self.test_directory, self.test_subdir)
+        os.rmdir(test_subdir)
+        open(test_subdir, 'w').close()
+        # Reading the ISIP file raises NotADirectoryError
+        self.assertTrue(self.opt_in_checker.check() == ISIPCheckResult.NO_FILE)
+        os.remove(test_subdir)
+        self.remove_test_subdir()
+
+    def test_isip_file_not_readable(self):
+        self.init_opt_in_checker()
+        with open(self.opt_in_checker.isip_file(), 'w') as file:
+            file.write("1")
+        # Permissions are emulated as chmod() does not restrict reading for root and on Windows
+        with patch.object(OptInChecker, '_read_isip_file', side_effect=PermissionError):
+            self.assertTrue(self.opt_in_checker.check() == ISIPCheckResult.DECLINED)
+        self.remove_test_subdir()
+
+    def test_run_in_notebook(self):
+        class ZMQInteractiveShell:
+            pass
+
+        class TerminalInteractiveShell:
+            pass
+
+        def raise_error():
+            raise RuntimeError
+
+        cases = [
+            (lambda: ZMQInteractiveShell(), True),
+            (lambda: TerminalInteractiveShell(), False),
+            (lambda: None, False),
+            (raise_error, False),
+        ]
+        for get_ipython, expected in cases:
+            ipython = ModuleType('IPython')
+            ipython.get_ipython = get_ipython
+            OptInChecker._check_run_in_notebook.cache_clear()
+            with patch.dict(sys.modules, {'IPython': ipython}):
+                self.assertTrue(OptInChecker._check_run_in_notebook() is expected)
+            OptInChecker._check_run_in_notebook.cache_clear()
+
+        # IPython is not loaded
+        with patch.dict(sys.modules):
+            sys.modules.pop('IPython', None)
+            self.assertTrue(OptInChecker._check_run_in_notebook() is False)
+        OptInChecker._check_run_in_notebook.cache_clear()